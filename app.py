@@ -1,22 +1,38 @@
 # app.py
+import os
 from flask import Flask, jsonify
 from flask_smorest import Api
 from flask_jwt_extended import JWTManager
 from config import Config
 from db import db
 # Import models so SQLAlchemy knows about all tables before create_all()
-from models import *  # noqa: F401,F403
+import models  # noqa: F401
 from auth import blp as AuthBlueprint
 from observations import blp as ObservationsBlueprint
 from telemetry import blp as TelemetryBlueprint
 
 
-def create_app():
+def handle_unprocessable(err):
+    exc = getattr(err, "exc", None)
+    messages = exc.messages if exc else ["Invalid request"]
+    return jsonify({"message": "Validation error", "errors": messages}), 422
+
+
+def create_app(test_config=None):
     app = Flask(__name__)
     app.config.from_object(Config)
+    # Overrides must land before db.init_app(), which builds the engine from
+    # SQLALCHEMY_DATABASE_URI; changing the URI afterwards has no effect.
+    if test_config:
+        app.config.update(test_config)
+
+    # Show SQL emitted by SQLAlchemy only when asked (SQL_ECHO=1); logging
+    # every statement is pure overhead on the request path.
+    app.config["SQLALCHEMY_ECHO"] = os.getenv("SQL_ECHO") == "1"
 
-    # Show SQL emitted by SQLAlchemy (good for demos / proof)
-    app.config["SQLALCHEMY_ECHO"] = True
+    # JSON responses: skip Flask's default key sorting, which costs a sort of
+    # every dict on list endpoints returning hundreds of observations.
+    app.json.sort_keys = False
 
     # Initialize extensions
     db.init_app(app)
@@ -24,15 +40,12 @@ def create_app():
     JWTManager(app)
 
     # Marshmallow / request validation errors -> consistent JSON
-    @app.errorhandler(422)
-    def handle_unprocessable(err):
-        exc = getattr(err, "exc", None)
-        messages = exc.messages if exc else ["Invalid request"]
-        return jsonify({"message": "Validation error", "errors": messages}), 422
+    app.register_error_handler(422, handle_unprocessable)
 
     # Create tables (for local/demo runs; in prod you'd use migrations)
-    with app.app_context():
-        db.create_all()
+    if app.config["AUTO_CREATE_TABLES"]:
+        with app.app_context():
+            db.create_all()
 
     # Register blueprints (endpoints)
     api.register_blueprint(AuthBlueprint)
@@ -11,6 +11,7 @@ from utils import require_roles
 blp = SmorestBlueprint("Auth", "auth", url_prefix="/auth", description="Authentication endpoints")
 
 @blp.route("/register", methods=["POST"])
+@jwt_required()
 @require_roles("admin")
 @blp.arguments(UserRegisterSchema)
 @blp.response(201, UserSchema)
@@ -44,5 +45,7 @@ def login(body):
 @blp.response(200, UserSchema)
 def me():
     jwt = get_jwt()
-    user = User.query.get(jwt.get("user_id"))
+    user = db.session.get(User, jwt.get("user_id"))
+    if not user:
+        abort(404, message="User not found")
     return user
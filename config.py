@@ -11,7 +11,9 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///bluewave.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "change-this-in-prod")
-    PROPAGATE_EXCEPTIONS = True
+    # create_all() on boot is for local/demo runs; set AUTO_CREATE_TABLES=0 where
+    # the schema is managed by migrations to skip the per-process metadata check.
+    AUTO_CREATE_TABLES = os.getenv("AUTO_CREATE_TABLES", "1") == "1"
 
     API_SPEC_OPTIONS = {
         "components": {
@@ -3,11 +3,10 @@
 # Meets DoD: supports date range + location query params and reduces returned items.
 
 from sqlalchemy import and_
-from dateutil import parser as dtparser
 from flask_smorest import abort
 
 from models import Observation
-from utils import ensure_aware_utc
+from utils import parse_iso_utc
 
 
 def _parse_dt(val: str):
@@ -15,8 +14,7 @@ def _parse_dt(val: str):
     if not val:
         return None
     try:
-        dt = dtparser.isoparse(val)
-        return ensure_aware_utc(dt)
+        return parse_iso_utc(val)
     except Exception:
         return None
 
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import func
+from sqlalchemy import func, insert
 from db import db
 
 class User(db.Model):
@@ -14,16 +14,26 @@ class User(db.Model):
 
 class Observation(db.Model):
     __tablename__ = "observations"
+    # buoy_id + time window + ORDER BY observed_at DESC is the dominant list query;
+    # the composite index also serves plain buoy_id lookups (leftmost prefix).
+    __table_args__ = (
+        db.Index("ix_obs_buoy_observed", "buoy_id", "observed_at"),
+        # default list order / keyset seek: ORDER BY observed_at DESC, id DESC
+        # (read backwards, so no DESC keys needed); also serves plain observed_at ranges
+        db.Index("ix_obs_observed_id", "observed_at", "id"),
+        # bbox filters: one range scan on latitude, longitude checked from the index
+        db.Index("ix_obs_lat_lon", "latitude", "longitude"),
+    )
     id = db.Column(db.Integer, primary_key=True)
-    buoy_id = db.Column(db.String(64), nullable=True, index=True)
+    buoy_id = db.Column(db.String(64), nullable=True)
 
     # When the observation was made (ISO 8601). Stored as timezone-aware UTC.
-    observed_at = db.Column(db.DateTime(timezone=True), nullable=False, index=True)
+    observed_at = db.Column(db.DateTime(timezone=True), nullable=False)
     timezone = db.Column(db.String(64), nullable=True)  # IANA tz name if provided
 
     # Coordinates
-    latitude = db.Column(db.Float, nullable=False, index=True)
-    longitude = db.Column(db.Float, nullable=False, index=True)
+    latitude = db.Column(db.Float, nullable=False)
+    longitude = db.Column(db.Float, nullable=False)
 
     # Environmental readings (optional where device lacks a sensor)
     sea_surface_temp_c = db.Column(db.Float, nullable=True)
@@ -46,3 +56,24 @@ class Observation(db.Model):
 
     created_at = db.Column(db.DateTime, nullable=False, server_default=func.now(), index=True)
     updated_at = db.Column(db.DateTime, nullable=False, server_default=func.now(), onupdate=func.now(), index=True)
+
+
+# Writable column names, and the NOT NULL ones a writer must supply
+# (no default / server default / autoincrement pk); used to validate bulk input.
+OBSERVATION_COLUMNS = frozenset(Observation.__table__.columns.keys())
+OBSERVATION_REQUIRED = tuple(
+    c.name for c in Observation.__table__.columns
+    if not c.nullable and not c.primary_key and c.default is None and c.server_default is None
+)
+
+def insert_observations(rows):
+    """
+    INSERT ... RETURNING id for a list of column dicts; ids in input order.
+
+    Without sort_by_parameter_order the rows go out as one multi-VALUES
+    statement (per insertmanyvalues page) instead of one INSERT per row,
+    which is what SQLite would otherwise fall back to. The autoincrement id
+    is assigned in VALUES order, so the ascending ids line up with `rows`.
+    """
+    stmt = insert(Observation).returning(Observation.id)
+    return sorted(db.session.execute(stmt, rows).scalars().all())
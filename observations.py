@@ -1,21 +1,37 @@
 # observations.py
 from flask_smorest import Blueprint, abort
-from flask import request
+from flask import request, g, current_app, Response, stream_with_context
+from sqlalchemy import update, delete, case, literal
+from sqlalchemy.orm import defer
 from db import db
-from models import Observation
+from models import Observation, OBSERVATION_COLUMNS, OBSERVATION_REQUIRED, insert_observations
 from schemas import (
     ObservationBaseSchema,
     ObservationCreateSchema,
     ObservationUpdateSchema,
     BulkUpdateItemsSchema,
+    dump_observation,
 )
 from flask_jwt_extended import jwt_required, get_jwt
-from utils import require_roles, require_tiers, quarter_start, ensure_aware_utc
-from datetime import datetime, timezone
-from dateutil import parser as dtparser
+from utils import (
+    require_roles,
+    require_tiers,
+    quarter_start,
+    ensure_aware_utc,
+    parse_iso_utc,
+    encode_cursor,
+    decode_cursor,
+    seek_before,
+    count_rows,
+    request_now_utc,
+    int_arg,
+    truthy_arg,
+)
+from datetime import datetime
 from marshmallow import Schema, fields  
 from typing import Optional
 import math
+from itertools import chain
 
 blp = Blueprint(
     "Observations",
@@ -25,44 +41,72 @@ blp = Blueprint(
 )
 
 LIST_SCHEMA = ObservationBaseSchema(many=True)
-ITEM_SCHEMA = ObservationBaseSchema()
 CREATE_SCHEMA = ObservationCreateSchema()
 UPDATE_SCHEMA = ObservationUpdateSchema()
 
+# rows fetched per round trip when streaming list pages
+STREAM_BATCH = 100
+
 # ----------------- Helpers -----------------
 
-def _block_if_old(obs: Observation):
-    """Prevent edits/deletes if record is prior to current quarter (UTC)."""
-    now_utc = datetime.now(timezone.utc)
-    observed_utc = ensure_aware_utc(obs.observed_at)
-    if observed_utc < quarter_start(now_utc):
-        abort(409, message="Edits to records prior to the current quarter are not allowed.")
+OLD_RECORD_MESSAGE = "Edits to records prior to the current quarter are not allowed."
 
-def _int_arg(name: str, default: int, *, minimum: int = 1, maximum: int = 500) -> int:
-    """Parse an int query param, with sane defaults and clamping."""
-    raw = request.args.get(name, None)
-    try:
-        val = int(raw) if raw not in (None, "") else default
-    except Exception:
-        val = default
-    if val < minimum:
-        val = minimum
-    if maximum is not None and val > maximum:
-        val = maximum
-    return val
+def _can_see_raw(claims) -> bool:
+    """Raw-tier users and admins may see raw_payload."""
+    return claims.get("tier") == "raw" or claims.get("role") == "admin"
+
+def _current_quarter_start() -> datetime:
+    return quarter_start(request_now_utc())
+
+def _block_if_old(obs: Observation, qstart: datetime):
+    """409 if the record is prior to the current quarter (`qstart`, UTC)."""
+    if ensure_aware_utc(obs.observed_at) < qstart:
+        abort(409, message=OLD_RECORD_MESSAGE)
+
+def _editable_or_abort(obs_id: int, qstart: datetime) -> Observation:
+    """Load obs_id after a guarded write matched nothing: 404 if missing, else 409 via _block_if_old."""
+    obs = db.session.get(Observation, obs_id)
+    if not obs:
+        abort(404, message="Observation not found")
+    _block_if_old(obs, qstart)
+    return obs
+
+def _update_if_editable(obs_id: int, values: dict) -> Observation:
+    """
+    UPDATE ... WHERE id = :id AND observed_at >= :qstart RETURNING *.
+    The quarter edit guard runs inside the database, so a permitted edit is
+    a single statement; the follow-up SELECT only happens for denied/missing rows.
+    """
+    qstart = _current_quarter_start()
+    obs = None
+    if values:
+        stmt = (
+            update(Observation)
+            .where(Observation.id == obs_id, Observation.observed_at >= qstart)
+            .values(**values)
+            .returning(Observation)
+        )
+        obs = db.session.execute(stmt).scalar_one_or_none()
+    if obs is None:
+        obs = _editable_or_abort(obs_id, qstart)
+    # Detach the fully loaded row so commit() doesn't expire it; otherwise the
+    # response dump would reload it with a second SELECT.
+    db.session.expunge(obs)
+    db.session.commit()
+    return obs
 
 def _parse_iso_dt_optional(val: Optional[str], label: str):
-    """Parse ISO8601 datetime if present, else None. 422 on failure."""
+    """Parse ISO8601 datetime (as UTC) if present, else None. 422 on failure."""
     if not val:
         return None
     try:
-        return dtparser.isoparse(val)
+        return parse_iso_utc(val)
     except Exception:
         abort(422, message=f"Invalid '{label}' ISO datetime")
 
-def _apply_filters(q):
+def _filter_criteria() -> list:
     """
-    Apply supported filters directly and robustly:
+    Parse the supported filter params into SQL criteria, directly and robustly:
       - start / end (or start_date / end_date), inclusive
       - buoy_id
       - bbox=min_lat,min_lon,max_lat,max_lon
@@ -71,24 +115,34 @@ def _apply_filters(q):
 
     NOTE: If no params are provided, this applies **no filters** so
     default calls return the full dataset (ordered by observed_at DESC).
+
+    The parsed criteria are cached on `g` so applying the filters more than
+    once in a request (e.g. count + page) doesn't re-parse the query string.
     """
+    cached = g.get("_obs_filter_criteria")
+    if cached is not None:
+        return cached
+
+    args = request.args
+    criteria = []
+
     # time range (accept aliases for back-compat)
-    start = request.args.get("start") or request.args.get("start_date")
-    end = request.args.get("end") or request.args.get("end_date")
+    start = args.get("start") or args.get("start_date")
+    end = args.get("end") or args.get("end_date")
     start_dt = _parse_iso_dt_optional(start, "start")
     end_dt = _parse_iso_dt_optional(end, "end")
     if start_dt:
-        q = q.filter(Observation.observed_at >= start_dt)
+        criteria.append(Observation.observed_at >= start_dt)
     if end_dt:
-        q = q.filter(Observation.observed_at <= end_dt)
+        criteria.append(Observation.observed_at <= end_dt)
 
     # buoy_id
-    buoy_id = request.args.get("buoy_id")
+    buoy_id = args.get("buoy_id")
     if buoy_id:
-        q = q.filter(Observation.buoy_id == buoy_id)
+        criteria.append(Observation.buoy_id == buoy_id)
 
     # bbox: min_lat,min_lon,max_lat,max_lon
-    bbox = request.args.get("bbox")
+    bbox = args.get("bbox")
     if bbox:
         try:
             parts = [float(x.strip()) for x in bbox.split(",")]
@@ -97,10 +151,10 @@ def _apply_filters(q):
             min_lat, min_lon, max_lat, max_lon = parts
         except Exception:
             abort(422, message="Invalid 'bbox'. Expected 'min_lat,min_lon,max_lat,max_lon'")
-        q = q.filter(Observation.latitude >= min_lat,
-                     Observation.latitude <= max_lat,
-                     Observation.longitude >= min_lon,
-                     Observation.longitude <= max_lon)
+        criteria.extend((Observation.latitude >= min_lat,
+                         Observation.latitude <= max_lat,
+                         Observation.longitude >= min_lon,
+                         Observation.longitude <= max_lon))
 
     # individual lat/lon bounds
     def _as_float(v):
@@ -111,57 +165,107 @@ def _apply_filters(q):
         except Exception:
             abort(422, message="Latitude/longitude bounds must be numbers")
 
-    lat_min = _as_float(request.args.get("latitude_min"))
-    lat_max = _as_float(request.args.get("latitude_max"))
-    lon_min = _as_float(request.args.get("longitude_min"))
-    lon_max = _as_float(request.args.get("longitude_max"))
+    lat_min = _as_float(args.get("latitude_min"))
+    lat_max = _as_float(args.get("latitude_max"))
+    lon_min = _as_float(args.get("longitude_min"))
+    lon_max = _as_float(args.get("longitude_max"))
 
     if lat_min is not None:
-        q = q.filter(Observation.latitude >= lat_min)
+        criteria.append(Observation.latitude >= lat_min)
     if lat_max is not None:
-        q = q.filter(Observation.latitude <= lat_max)
+        criteria.append(Observation.latitude <= lat_max)
     if lon_min is not None:
-        q = q.filter(Observation.longitude >= lon_min)
+        criteria.append(Observation.longitude >= lon_min)
     if lon_max is not None:
-        q = q.filter(Observation.longitude <= lon_max)
+        criteria.append(Observation.longitude <= lon_max)
+
+    g._obs_filter_criteria = criteria
+    return criteria
 
-    return q
+def _apply_filters(q):
+    """Apply the request's filter params (see _filter_criteria) to `q`."""
+    if not request.args:
+        return q
+    criteria = _filter_criteria()
+    return q.filter(*criteria) if criteria else q
 
 def _serialize_page(q):
     """
-    Robust manual pagination:
+    Robust manual pagination without a COUNT(*) per request, streamed as JSON:
       - defaults: page=1, page_size=50
       - clamps to [1..500]
-      - sorts by observed_at DESC
-      - if requested page is beyond last page, it snaps to the last page
-        so users don't see an empty list accidentally.
+      - sorts by observed_at DESC, id DESC
+      - fetches page_size + 1 rows to report `has_next`
+      - `total` is only computed on ?with_total=1; in that case a page
+        beyond the last one snaps to the last page as before.
+      - keyset mode: ?after=<next_cursor> (or the explicit
+        ?before=<observed_at>[&before_id=<id>]) seeks past the last row of
+        the previous page using the observed_at index instead of OFFSET
+        (page is ignored). Each page returns `next_cursor` plus
+        `next_before` / `next_before_id` when there is more data.
+      - rows are fetched STREAM_BATCH at a time and each item is written to
+        the response as it is dumped, so a large page is never held in
+        memory as a full ORM list plus a full list of dicts.
     """
-    page = _int_arg("page", 1, minimum=1, maximum=10_000)
-    page_size = _int_arg("page_size", 50, minimum=1, maximum=500)
-
-    total = q.count()
-    q = q.order_by(Observation.observed_at.desc())
-
-    
-    last_page = max(1, math.ceil(total / page_size)) if total else 1
-    if page > last_page:
-        page = last_page
+    page = int_arg("page", 1, minimum=1, maximum=10_000)
+    page_size = int_arg("page_size", 50, minimum=1, maximum=500)
 
+    after = request.args.get("after")
+    if after:
+        try:
+            before_dt, before_id = decode_cursor(after)
+        except ValueError:
+            abort(422, message="Invalid 'after' cursor")
+        before_dt = ensure_aware_utc(before_dt)
+    else:
+        before = request.args.get("before")
+        before_dt = _parse_iso_dt_optional(before, "before")
+        before_id = int_arg("before_id", 0, minimum=0, maximum=None) if before_dt else 0
+
+    total = None
+    if truthy_arg("with_total"):
+        total = count_rows(q, Observation.id)
+
+    if before_dt is not None:
+        page = 1
+        q = seek_before(q, Observation.observed_at, Observation.id, before_dt, before_id)
+    elif total is not None:
+        last_page = max(1, math.ceil(total / page_size))
+        if page > last_page:
+            page = last_page
+
+    q = q.order_by(Observation.observed_at.desc(), Observation.id.desc())
     offset = (page - 1) * page_size
-    items = q.limit(page_size).offset(offset).all()
-
-    claims = get_jwt()
-    data = ObservationBaseSchema(many=True).dump(items)
-    if claims.get("tier") != "raw" and claims.get("role") != "admin":
-        for d in data:
-            d.pop("raw_payload", None)
-
-    return {
-        "page": page,
-        "page_size": page_size,
-        "total": total,
-        "items": data,
-    }
+    rows = iter(q.limit(page_size + 1).offset(offset).yield_per(STREAM_BATCH))
+    # Run the query and pull the first row before any bytes go out, so a DB
+    # error is still a real 500 rather than a 200 with a truncated body.
+    first = next(rows, None)
+
+    include_raw = _can_see_raw(get_jwt())
+    head = {"page": page, "page_size": page_size}
+    if total is not None:
+        head["total"] = total
+
+    def generate():
+        dumps = current_app.json.dumps
+        # '{"page": 1, ..., "items": [' -- the envelope is built around the streamed items
+        yield dumps(head)[:-1] + ', "items": ['
+        has_next, last = False, None
+        for n, obs in enumerate(chain((first,), rows) if first is not None else ()):
+            if n == page_size:
+                has_next = True
+                break
+            yield ("," if n else "") + dumps(dump_observation(obs, include_raw))
+            last = obs
+        tail = {"has_next": has_next}
+        if has_next:
+            last_ts = ensure_aware_utc(last.observed_at)
+            tail["next_cursor"] = encode_cursor(last_ts, last.id)
+            tail["next_before"] = last_ts.isoformat()
+            tail["next_before_id"] = last.id
+        yield "], " + dumps(tail)[1:]
+
+    return Response(stream_with_context(generate()), mimetype="application/json")
 
 # ----------------- Filters / list / get -----------------
 
@@ -186,6 +290,14 @@ def _serialize_page(q):
   {"in":"query","name":"longitude_max","schema":{"type":"number"}},
   {"in":"query","name":"page","schema":{"type":"integer","default":1}},
   {"in":"query","name":"page_size","schema":{"type":"integer","default":50}},
+  {"in":"query","name":"with_total","schema":{"type":"boolean","default":False},
+   "description":"Also return 'total' (runs an extra COUNT query)"},
+  {"in":"query","name":"after","schema":{"type":"string"},
+   "description":"Keyset cursor: 'next_cursor' from the previous page"},
+  {"in":"query","name":"before","schema":{"type":"string","format":"date-time"},
+   "description":"Keyset cursor: 'next_before' from the previous page"},
+  {"in":"query","name":"before_id","schema":{"type":"integer"},
+   "description":"Keyset cursor: 'next_before_id' from the previous page"},
 ])
 def list_observations():
     """
@@ -195,21 +307,22 @@ def list_observations():
     ordered by `observed_at` descending (i.e., default inputs show data).
     """
     q = Observation.query
+    if not _can_see_raw(get_jwt()):
+        # processed tier never sees raw_payload: keep the widest column out of the SELECT
+        q = q.options(defer(Observation.raw_payload))
     q = _apply_filters(q)
-    return _serialize_page(q), 200
+    return _serialize_page(q)
 
 @blp.route("/<int:obs_id>", methods=["GET"])
 @jwt_required()
 @require_tiers("processed", "raw")
 def get_observation(obs_id):
-    obs = db.session.get(Observation, obs_id)
+    include_raw = _can_see_raw(get_jwt())
+    options = [] if include_raw else [defer(Observation.raw_payload)]
+    obs = db.session.get(Observation, obs_id, options=options)
     if not obs:
         abort(404, message="Observation not found")
-    data = ITEM_SCHEMA.dump(obs)
-    claims = get_jwt()
-    if claims.get("tier") != "raw" and claims.get("role") != "admin":
-        data.pop("raw_payload", None)
-    return data, 200
+    return dump_observation(obs, include_raw), 200
 
 # ----------------- Create / Update / Delete -----------------
 
@@ -235,14 +348,7 @@ def create_observation(body):
 @blp.arguments(ObservationCreateSchema)
 @blp.response(200, ObservationBaseSchema)
 def replace_observation(body, obs_id):
-    obs = db.session.get(Observation, obs_id)
-    if not obs:
-        abort(404, message="Observation not found")
-    _block_if_old(obs)
-    for k, v in body.items():
-        setattr(obs, k, v)
-    db.session.commit()
-    return obs
+    return _update_if_editable(obs_id, body)
 
 @blp.route("/<int:obs_id>", methods=["PATCH"])
 @jwt_required()
@@ -250,24 +356,18 @@ def replace_observation(body, obs_id):
 @blp.arguments(ObservationUpdateSchema)
 @blp.response(200, ObservationBaseSchema)
 def update_observation(body, obs_id):
-    obs = db.session.get(Observation, obs_id)
-    if not obs:
-        abort(404, message="Observation not found")
-    _block_if_old(obs)
-    for k, v in body.items():
-        setattr(obs, k, v)
-    db.session.commit()
-    return obs
+    return _update_if_editable(obs_id, body)
 
 @blp.route("/<int:obs_id>", methods=["DELETE"])
 @jwt_required()
 @require_roles("admin")
 def delete_observation(obs_id):
-    obs = db.session.get(Observation, obs_id)
-    if not obs:
-        abort(404, message="Observation not found")
-    _block_if_old(obs)
-    db.session.delete(obs)
+    qstart = _current_quarter_start()
+    res = db.session.execute(
+        delete(Observation).where(Observation.id == obs_id, Observation.observed_at >= qstart)
+    )
+    if res.rowcount == 0:
+        _editable_or_abort(obs_id, qstart)
     db.session.commit()
     return {"message": "Deleted"}, 204
 
@@ -282,15 +382,16 @@ class BulkCreateDocSchema(Schema):
 
 def _normalize_observed_at_value(val):
     """Return a UTC-aware datetime for observed_at, or raise ValueError."""
-    if val is None:
-        return datetime.now(timezone.utc)
-    if isinstance(val, datetime):
-        return ensure_aware_utc(val)
-    if isinstance(val, str):
+    # Branches ordered by frequency: JSON bodies almost always carry strings.
+    if type(val) is str:
         try:
-            return ensure_aware_utc(dtparser.isoparse(val))
+            return parse_iso_utc(val)
         except Exception:
             raise ValueError("Invalid observed_at; must be ISO 8601 datetime")
+    if val is None:
+        return request_now_utc()
+    if isinstance(val, datetime):
+        return ensure_aware_utc(val)
     raise ValueError("Invalid observed_at type")
 
 @blp.route("/bulk", methods=["POST"])
@@ -300,14 +401,17 @@ def _normalize_observed_at_value(val):
 def bulk_create(payload):
     """
     Create many observations in one request.
-    Commit each successful item immediately so one bad item doesn't poison the session.
+    Pass 1 validates and normalizes every item in Python without touching
+    the session; pass 2 inserts the good rows with one multi-VALUES
+    INSERT ... RETURNING (see models.insert_observations). If that batch still fails at the DB, each row is
+    retried in its own SAVEPOINT so one bad item doesn't poison the others.
     """
     items_in = payload.get("items", [])
     if not isinstance(items_in, list):
         return {"message": "'items' must be a list"}, 400
 
     claims = get_jwt()
-    created = []
+    rows = []      # (index, column dict) ready to insert
     errors = []
 
     for i, item in enumerate(items_in):
@@ -323,51 +427,158 @@ def bulk_create(payload):
                 errors.append({"index": i, "error": "Missing required field 'buoy_id'"})
                 continue
 
+            unknown = sorted(set(item) - OBSERVATION_COLUMNS)
+            if unknown:
+                errors.append({"index": i, "error": f"Unknown field(s): {', '.join(unknown)}"})
+                continue
+
             item["observed_at"] = _normalize_observed_at_value(item.get("observed_at"))
 
-            obs = Observation(**item)
-            db.session.add(obs)
-            db.session.commit()
-            created.append(obs)
+            missing = [name for name in OBSERVATION_REQUIRED if item.get(name) is None]
+            if missing:
+                errors.append({"index": i, "error": f"Missing required field '{missing[0]}'"})
+                continue
+            rows.append((i, item))
         except Exception as e:
-            db.session.rollback()
             errors.append({"index": i, "error": str(e)})
 
+    inserted = []  # (index, id)
+    if rows:
+        try:
+            with db.session.begin_nested():
+                ids = insert_observations([row for _, row in rows])
+            inserted = list(zip((i for i, _ in rows), ids))
+        except Exception:
+            for i, row in rows:
+                try:
+                    with db.session.begin_nested():
+                        inserted.append((i, insert_observations([row])[0]))
+                except Exception as e:
+                    errors.append({"index": i, "error": str(e)})
+            errors.sort(key=lambda err: err["index"])
+
+    db.session.commit()
+
+    created = []
+    if inserted:
+        by_id = {o.id: o for o in Observation.query.filter(Observation.id.in_([oid for _, oid in inserted]))}
+        created = [by_id[oid] for _, oid in inserted]
+
     return {
-        "created": ObservationBaseSchema(many=True).dump(created),
+        "created": LIST_SCHEMA.dump(created),
         "errors": errors
     }, (207 if errors else 201)
 
+def _update_rows(changes):
+    """
+    Apply [(obs_id, {column: value})] as ONE UPDATE ... WHERE id IN (...),
+    each mutated column set via CASE id WHEN ... THEN ... ELSE <column> END.
+    """
+    by_col = {}
+    for obs_id, values in changes:
+        for col, val in values.items():
+            by_col.setdefault(col, {})[obs_id] = val
+    table = Observation.__table__
+    stmt = (
+        update(Observation)
+        .where(Observation.id.in_([obs_id for obs_id, _ in changes]))
+        .values({
+            col: case(
+                {obs_id: literal(val, table.c[col].type) for obs_id, val in vals.items()},
+                value=Observation.id,
+                else_=table.c[col],
+            )
+            for col, vals in by_col.items()
+        })
+        .execution_options(synchronize_session=False)
+    )
+    db.session.execute(stmt)
+
+_INVALID_ID = object()
+
+def _bulk_item_id(raw):
+    """Primary key of a bulk item: an int or a digit string; None if absent, _INVALID_ID otherwise."""
+    if raw is None or raw == "":
+        return None
+    if isinstance(raw, int) and not isinstance(raw, bool):
+        return raw
+    if isinstance(raw, str) and raw.isdigit():
+        return int(raw)
+    return _INVALID_ID
+
 @blp.route("/bulk", methods=["PATCH"])
 @jwt_required()
 @require_roles("admin")
 @blp.arguments(BulkUpdateItemsSchema)  
 def bulk_update(payload):
-    updated = []
+    """
+    Update many observations in one request.
+    Targets are loaded with a single WHERE id IN (...) query and every item is
+    validated in Python (quarter guard, known columns, NOT NULL); the valid
+    changes are then written with a single CASE-WHEN UPDATE. If that statement
+    fails at the DB, items are retried one by one in savepoints so one bad item
+    doesn't poison the others. Everything is committed once at the end.
+    """
+    qstart = _current_quarter_start()
+    changes = []   # (index, obs_id, values)
     errors = []
+    # ids keyed as ints to match the prefetched rows ("1" from JSON is id 1)
+    item_ids = [_bulk_item_id(item.get("id")) for item in payload["items"]]
+    ids = [obs_id for obs_id in item_ids if isinstance(obs_id, int)]
+    objs = {o.id: o for o in Observation.query.filter(Observation.id.in_(ids))} if ids else {}
+    # quarter guard evaluated once over the prefetched rows, not per item
+    old_ids = {o.id for o in objs.values() if ensure_aware_utc(o.observed_at) < qstart}
     for i, item in enumerate(payload["items"]):
-        obs_id = item.get("id")
-        if not obs_id:
+        obs_id = item_ids[i]
+        if obs_id is None:
             errors.append({"index": i, "error": "Missing id"})
             continue
-        obs = db.session.get(Observation, obs_id)
-        if not obs:
+        if obs_id is _INVALID_ID:
+            errors.append({"index": i, "error": f"Invalid id {item.get('id')!r}"})
+            continue
+        if obs_id not in objs:
             errors.append({"index": i, "error": f"Observation {obs_id} not found"})
             continue
+        if obs_id in old_ids:
+            errors.append({"index": i, "id": obs_id, "error": OLD_RECORD_MESSAGE})
+            continue
         try:
-            _block_if_old(obs)
-            for k, v in item.items():
-                if k == "id":
-                    continue
-                if k == "observed_at" and isinstance(v, str):
-                    v = _normalize_observed_at_value(v)
-                setattr(obs, k, v)
-            db.session.commit()
-            updated.append(obs)
+            values = {k: v for k, v in item.items() if k != "id"}
+            unknown = sorted(set(values) - OBSERVATION_COLUMNS)
+            if unknown:
+                raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+            if isinstance(values.get("observed_at"), str):
+                values["observed_at"] = _normalize_observed_at_value(values["observed_at"])
+            nulled = [name for name in OBSERVATION_REQUIRED if name in values and values[name] is None]
+            if nulled:
+                raise ValueError(f"Field '{nulled[0]}' may not be null")
+            changes.append((i, obs_id, values))
         except Exception as e:
-            db.session.rollback()
             errors.append({"index": i, "id": obs_id, "error": str(e)})
+
+    writes = [(obs_id, values) for _, obs_id, values in changes if values]
+    done = [obs_id for _, obs_id, _ in changes]
+    if writes:
+        try:
+            with db.session.begin_nested():
+                _update_rows(writes)
+        except Exception:
+            done = []
+            for i, obs_id, values in changes:
+                try:
+                    if values:
+                        with db.session.begin_nested():
+                            _update_rows([(obs_id, values)])
+                    done.append(obs_id)
+                except Exception as e:
+                    errors.append({"index": i, "id": obs_id, "error": str(e)})
+            errors.sort(key=lambda err: err["index"])
+    db.session.commit()
+
+    # One SELECT refreshes every (now expired) updated row for the response.
+    fresh = {o.id: o for o in Observation.query.filter(Observation.id.in_(done))} if done else {}
+    updated = [fresh[obs_id] for obs_id in done]
     return {
-        "updated": ObservationBaseSchema(many=True).dump(updated),
+        "updated": LIST_SCHEMA.dump(updated),
         "errors": errors
     }, (207 if errors else 200)
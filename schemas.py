@@ -1,7 +1,6 @@
-from marshmallow import Schema, fields, validate, pre_load, post_dump
-from datetime import datetime
-from dateutil import parser as dtparser
-import pytz
+from marshmallow import Schema, fields, validate, pre_load
+from datetime import timezone
+from utils import parse_iso, get_tz, ensure_aware_utc
 from marshmallow import Schema, fields
 
 class UserSchema(Schema):
@@ -64,25 +63,23 @@ class ObservationBaseSchema(Schema):
         We construct an ISO 8601 UTC timestamp for 'observed_at' and then remove the helper keys
         so they're not treated as unknown fields (avoids 422).
         """
+        # Common case: client sent observed_at directly, nothing to combine or strip
+        if isinstance(data, dict) and "observed_at" in data and "date" not in data and "time" not in data:
+            return data
         if isinstance(data, dict):
             if "observed_at" not in data and ("date" in data and "time" in data):
                 tzname = data.get("timezone") or "UTC"
-                dt_str = f"{data['date']}T{data['time']}"
-                dt = dtparser.isoparse(dt_str)
-                try:
-                    tz = pytz.timezone(tzname)
+                dt = parse_iso(f"{data['date']}T{data['time']}")
+                # get_tz only handles names; a non-string zone is just an unknown one
+                tz = get_tz(tzname) if isinstance(tzname, str) else None
+                if tz is not None:
                     # Localize then convert to UTC
                     if dt.tzinfo is None or dt.tzinfo.utcoffset(dt) is None:
-                        dt = tz.localize(dt)
-                    dt = dt.astimezone(pytz.UTC)
-                except Exception:
-                    # Fallback: parse as-is and force UTC conversion if possible
-                    dt = dtparser.isoparse(dt_str)
-                    if dt.tzinfo is None or dt.tzinfo.utcoffset(dt) is None:
-                        # Treat naive as UTC
-                        dt = dt.replace(tzinfo=pytz.UTC)
-                    else:
-                        dt = dt.astimezone(pytz.UTC)
+                        dt = dt.replace(tzinfo=tz)
+                    dt = dt.astimezone(timezone.utc)
+                else:
+                    # Unknown zone: treat naive as UTC, convert aware to UTC
+                    dt = ensure_aware_utc(dt)
                 data["observed_at"] = dt.isoformat()
 
             # ✅ Remove helper keys so Marshmallow doesn't flag them as unknown
@@ -91,14 +88,29 @@ class ObservationBaseSchema(Schema):
 
         return data
 
-    @post_dump
-    def ensure_isoformat(self, data, **kwargs):
-        # Guarantee ISO 8601 strings on output for datetime fields
-        for k in ["observed_at", "created_at", "updated_at"]:
-            v = data.get(k)
-            if isinstance(v, datetime):
-                data[k] = v.isoformat()
-        return data
+# Hand-written fast path for the read-heavy endpoints. Produces the same
+# output as ObservationBaseSchema().dump(obs), keys in the schema's field
+# order, but reads attributes directly instead of walking marshmallow's
+# per-field serializer stack.
+_OBS_DUMP_FIELDS = (
+    "id", "buoy_id", "observed_at", "timezone", "latitude", "longitude",
+    "sea_surface_temp_c", "air_temp_c", "humidity_pct", "wind_speed_mps",
+    "wind_direction_deg", "precipitation_mm", "haze",
+    "salinity_psu", "ph", "pollutant_index", "notes",
+    "raw_payload", "created_at", "updated_at",
+)
+_OBS_DATETIME_FIELDS = frozenset({"observed_at", "created_at", "updated_at"})
+
+def dump_observation(obs, include_raw=True):
+    data = {}
+    for name in _OBS_DUMP_FIELDS:
+        if name == "raw_payload" and not include_raw:
+            continue
+        v = getattr(obs, name)
+        if v is not None and name in _OBS_DATETIME_FIELDS:
+            v = v.isoformat()
+        data[name] = v
+    return data
 
 class ObservationCreateSchema(ObservationBaseSchema):
     pass
@@ -2,12 +2,10 @@
 from flask_smorest import Blueprint, abort
 from flask import request
 from db import db
-from models import Observation
+from models import Observation, OBSERVATION_REQUIRED, insert_observations
 from flask_jwt_extended import jwt_required, get_jwt
-from utils import require_roles, require_tiers, ensure_aware_utc
-from datetime import datetime, timezone, date as dt_date, time as dt_time
-from dateutil import parser as dtparser
-from dateutil import tz as dttz
+from utils import require_roles, require_tiers, ensure_aware_utc, parse_iso_utc, get_tz, encode_cursor, decode_cursor, count_rows, request_now_utc, int_arg, truthy_arg
+from datetime import datetime, date as dt_date, time as dt_time
 from marshmallow import Schema, fields
 
 blp = Blueprint(
@@ -18,7 +16,7 @@ blp = Blueprint(
 )
 
 # ---- Request body schema so Swagger shows a JSON editor & sets Content-Type ----
-class TelemetryIngestSchema(Schema):
+class TelemetryRecordSchema(Schema):
     buoy_id = fields.Str(required=False)              
     observed_at = fields.DateTime(allow_none=True)    
     date = fields.Date(allow_none=True)               
@@ -41,47 +39,50 @@ class TelemetryIngestSchema(Schema):
     extra = fields.Dict(allow_none=True)              
 
 
-def _json_safe(obj):
-    """Recursively convert datetime/date/time to ISO strings so JSON column accepts it."""
-    if isinstance(obj, (datetime, dt_date, dt_time)):
-        return obj.isoformat()
-    if isinstance(obj, dict):
-        return {k: _json_safe(v) for k, v in obj.items()}
-    if isinstance(obj, list):
-        return [_json_safe(v) for v in obj]
-    if isinstance(obj, tuple):
-        return tuple(_json_safe(v) for v in obj)
-    return obj
+class TelemetryIngestSchema(TelemetryRecordSchema):
+    # Batch form: {"items": [<record>, ...]} ingests every record with one INSERT
+    items = fields.List(fields.Nested(TelemetryRecordSchema), allow_none=True)
 
 
-def _int_arg(name, default):
-    """Robust int parsing for query params with sensible defaults."""
-    try:
-        val = request.args.get(name, None)
-        return int(val) if val not in (None, "") else default
-    except Exception:
-        return default
+# Payload keys that map straight onto Observation columns
+KNOWN_KEYS = frozenset({
+    "buoy_id", "timezone", "latitude", "longitude",
+    "sea_surface_temp_c", "air_temp_c", "humidity_pct",
+    "wind_speed_mps", "wind_direction_deg", "precipitation_mm", "haze",
+    "salinity_psu", "ph", "pollutant_index", "notes",
+})
 
 
-@blp.route("", methods=["POST"])
-@jwt_required()
-@require_roles("admin", "device")
-@blp.arguments(TelemetryIngestSchema)   
-@blp.response(201)
-def ingest(body):
-    if not isinstance(body, dict):
-        abort(400, message="JSON body required")
+def _json_safe(body):
+    """
+    Make a schema-loaded body JSON-safe for the raw_payload column.
+    Only top-level fields (observed_at/date/time) are parsed into Python
+    date/time objects; nested dicts (sensors/extra) come straight from the
+    request JSON, so there is nothing to walk recursively.
+    """
+    return {
+        k: v.isoformat() if isinstance(v, (datetime, dt_date, dt_time)) else v
+        for k, v in body.items()
+    }
+
+
+def _telemetry_item(obs):
+    """Serialize a telemetry row to JSON-friendly primitives (direct attribute reads)."""
+    return {
+        "id": obs.id,
+        "buoy_id": obs.buoy_id,
+        "observed_at": obs.observed_at.isoformat() if obs.observed_at else None,
+        "latitude": obs.latitude,
+        "longitude": obs.longitude,
+        "raw_payload": obs.raw_payload,
+        "created_at": obs.created_at.isoformat() if obs.created_at else None,
+    }
 
-    claims = get_jwt()
 
+def _telemetry_row(body, claims):
+    """Column values (incl. raw_payload) for one schema-loaded telemetry record."""
     # Map known fields (others remain only in raw_payload)
-    known_keys = [
-        "buoy_id", "timezone", "latitude", "longitude",
-        "sea_surface_temp_c", "air_temp_c", "humidity_pct",
-        "wind_speed_mps", "wind_direction_deg", "precipitation_mm", "haze",
-        "salinity_psu", "ph", "pollutant_index", "notes"
-    ]
-    known = {k: body.get(k) for k in known_keys if k in body}
+    known = {k: body[k] for k in KNOWN_KEYS & body.keys()}
 
     # Device role cannot spoof buoy_id
     if claims.get("role") == "device":
@@ -90,34 +91,20 @@ def ingest(body):
     # --- Normalize observed_at to UTC-aware datetime ---
     val = body.get("observed_at")
     if val is not None:
-        # Case 1: observed_at provided (Marshmallow may have parsed it already)
-        if isinstance(val, datetime):
-            dt_val = val
-        elif isinstance(val, str):
-            try:
-                dt_val = dtparser.isoparse(val)
-            except Exception:
-                abort(422, message="Invalid observed_at. Use ISO 8601 (e.g., 2025-08-26T09:10:00Z).")
-        else:
+        # Case 1: observed_at provided (TelemetryIngestSchema already parsed it)
+        if not isinstance(val, datetime):
             abort(422, message="Invalid observed_at type.")
-        known["observed_at"] = ensure_aware_utc(dt_val)
+        known["observed_at"] = ensure_aware_utc(val)
 
     elif body.get("date") is not None and body.get("time") is not None:
         # Case 2: date + time (+ optional timezone)
         tzname = body.get("timezone") or "UTC"
         d, t = body.get("date"), body.get("time")
 
-        # Combine date+time whether parsed or string
-        if isinstance(d, dt_date) and isinstance(t, dt_time):
-            dt_local = datetime.combine(d, t)
-        else:
-            iso_local = f"{d}T{t}"
-            try:
-                dt_local = dtparser.isoparse(iso_local)
-            except Exception:
-                abort(422, message="Invalid date/time. Expect date like 2025-08-26 and time like 09:10:00.")
-
-        tzinfo = dttz.gettz(tzname)
+        # Schema already parsed both (fields.Date / fields.Time)
+        dt_local = datetime.combine(d, t)
+
+        tzinfo = get_tz(tzname)
         if tzinfo is None:
             abort(422, message=f"Invalid timezone '{tzname}'. Use a valid IANA name, e.g., 'UTC'.")
 
@@ -128,16 +115,60 @@ def ingest(body):
 
     else:
         # Case 3: default to now (UTC)
-        known["observed_at"] = datetime.now(timezone.utc)
+        known["observed_at"] = request_now_utc()
     # --- end observed_at normalize ---
 
     # Ensure raw_payload is JSON-serializable (dates -> strings)
-    raw_payload = _json_safe(body)
+    known["raw_payload"] = _json_safe(body)
+    return known
+
+
+def _missing_required(row):
+    """First NOT NULL column (e.g. latitude) the record left empty, else None."""
+    return next((name for name in OBSERVATION_REQUIRED if row.get(name) is None), None)
+
 
-    obs = Observation(**known, raw_payload=raw_payload)
-    db.session.add(obs)
+@blp.route("", methods=["POST"])
+@jwt_required()
+@require_roles("admin", "device")
+@blp.arguments(TelemetryIngestSchema)   
+@blp.response(201)
+def ingest(body):
+    """
+    Ingest one telemetry record, or many via {"items": [...]}.
+
+    Rows are written with INSERT ... RETURNING id, so the new id is known
+    without re-reading the row after commit; a batch is validated up front,
+    then written as a single multi-VALUES INSERT and a single commit (all or nothing).
+    """
+    if not isinstance(body, dict):
+        abort(400, message="JSON body required")
+
+    claims = get_jwt()
+
+    items = body.pop("items", None)
+    if items is not None:
+        if not items:
+            # 422s below are explicit JSON: the app's 422 handler would replace an abort() message
+            return {"message": "'items' must not be empty"}, 422
+        # Validate every record before writing, so one bad record is a 422
+        # naming it rather than an IntegrityError that fails the whole batch.
+        rows = [_telemetry_row(rec, claims) for rec in items]
+        for i, row in enumerate(rows):
+            missing = _missing_required(row)
+            if missing:
+                return {"message": f"items[{i}]: missing required field '{missing}'"}, 422
+        ids = insert_observations(rows)
+        db.session.commit()
+        return {"ids": ids, "message": f"Ingested {len(ids)}"}, 201
+
+    row = _telemetry_row(body, claims)
+    missing = _missing_required(row)
+    if missing:
+        return {"message": f"Missing required field '{missing}'"}, 422
+    ids = insert_observations([row])
     db.session.commit()
-    return {"id": obs.id, "message": "Ingested"}, 201
+    return {"id": ids[0], "message": "Ingested"}, 201
 
 
 @blp.route("", methods=["GET"])
@@ -151,13 +182,24 @@ def ingest(body):
      "description":"ISO 8601 start (inclusive)"},
     {"in":"query","name":"end","schema":{"type":"string","format":"date-time"},
      "description":"ISO 8601 end (inclusive)"},
+    {"in":"query","name":"after","schema":{"type":"string"},
+     "description":"Keyset cursor: 'next_cursor' from the previous page (page is ignored)"},
+    {"in":"query","name":"with_total","schema":{"type":"boolean","default":False},
+     "description":"Also return 'total' (runs an extra COUNT query)"},
 ])
 def list_raw():
-    """List recent telemetry with optional filters."""
+    """
+    List recent telemetry with optional filters.
+
+    Newest-first in ingestion order (id DESC, i.e. created_at order). Pages
+    are fetched as page_size + 1 rows to report `has_next` without a COUNT(*);
+    `total` is only computed on ?with_total=1. Pass `next_cursor` back as
+    ?after= to seek to the next page on the primary key instead of OFFSET.
+    """
     from sqlalchemy import desc
 
-    page = _int_arg("page", 1)
-    page_size = _int_arg("page_size", 50)
+    page = int_arg("page", 1, minimum=1, maximum=10_000)
+    page_size = int_arg("page_size", 50, minimum=1, maximum=500)
 
     q = Observation.query
 
@@ -169,7 +211,7 @@ def list_raw():
     start = request.args.get("start")
     if start:
         try:
-            q = q.filter(Observation.observed_at >= dtparser.isoparse(start))
+            q = q.filter(Observation.observed_at >= parse_iso_utc(start))
         except Exception:
             # explicit JSON to keep message predictable for tests/clients
             return {"message": "Invalid 'start' ISO datetime"}, 422
@@ -177,34 +219,50 @@ def list_raw():
     end = request.args.get("end")
     if end:
         try:
-            q = q.filter(Observation.observed_at <= dtparser.isoparse(end))
+            q = q.filter(Observation.observed_at <= parse_iso_utc(end))
         except Exception:
             
             return {"message": "Invalid 'end' ISO datetime"}, 422
 
-    q = q.order_by(desc(Observation.created_at)).paginate(
-        page=page, per_page=page_size, error_out=False
+    total = None
+    if truthy_arg("with_total"):
+        total = count_rows(q, Observation.id)
+
+    after = request.args.get("after")
+    if after:
+        try:
+            # Only the id is used for the seek; see next_cursor below
+            _, after_id = decode_cursor(after)
+        except ValueError:
+            return {"message": "Invalid 'after' cursor"}, 422
+        page = 1
+        q = q.filter(Observation.id < after_id)
+
+    rows = (
+        q.order_by(desc(Observation.id))
+        .limit(page_size + 1)
+        .offset((page - 1) * page_size)
+        .all()
     )
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
 
-    # Serialize to JSON-friendly primitives
-    items = []
-    for obs in q.items:
-        items.append({
-            "id": obs.id,
-            "buoy_id": obs.buoy_id,
-            "observed_at": obs.observed_at.isoformat() if obs.observed_at else None,
-            "latitude": obs.latitude,
-            "longitude": obs.longitude,
-            "raw_payload": obs.raw_payload,
-            "created_at": obs.created_at.isoformat() if obs.created_at else None,
-        })
+    items = [_telemetry_item(obs) for obs in rows]
 
-    return {
+    result = {
         "page": page,
         "page_size": page_size,
-        "total": q.total,
+        "has_next": has_next,
         "items": items,
-    }, 200
+    }
+    if total is not None:
+        result["total"] = total
+    if has_next and rows:
+        # Same (timestamp, id) cursor format as /observations so decode_cursor
+        # validates both; the seek itself needs only the id, since id order is
+        # ingestion (created_at) order.
+        result["next_cursor"] = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return result, 200
 
 
 @blp.route("/<int:obs_id>", methods=["GET"])
@@ -215,12 +273,4 @@ def get_raw_by_id(obs_id: int):
     obs = db.session.get(Observation, obs_id)
     if not obs:
         abort(404, message="Observation not found")
-    return {
-        "id": obs.id,
-        "buoy_id": obs.buoy_id,
-        "observed_at": obs.observed_at.isoformat() if obs.observed_at else None,
-        "latitude": obs.latitude,
-        "longitude": obs.longitude,
-        "raw_payload": obs.raw_payload,
-        "created_at": obs.created_at.isoformat() if obs.created_at else None,
-    }, 200
+    return _telemetry_item(obs), 200
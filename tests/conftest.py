@@ -1,31 +1,77 @@
 # tests/conftest.py
 import os
 import pytest
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
 from flask_jwt_extended import create_access_token
 
 from app import create_app, db as _db
+from factories import make_observation
+
+TEST_CONFIG = dict(
+    TESTING=True,
+    # In-memory SQLite: Flask-SQLAlchemy pins it to a single connection, so the
+    # schema is built once per session and never touches instance/bluewave.db.
+    SQLALCHEMY_DATABASE_URI="sqlite://",
+    SQLALCHEMY_TRACK_MODIFICATIONS=False,
+    JWT_SECRET_KEY="test-secret",
+    # Session-scoped tokens must outlive the whole run
+    JWT_ACCESS_TOKEN_EXPIRES=timedelta(days=1),
+    PROPAGATE_EXCEPTIONS=True,
+    # Make errors bubble up to tests
+    API_TITLE="BlueWave API (tests)",
+    API_VERSION="1.0-test",
+)
 
 @pytest.fixture(scope="session")
 def app():
-    # Build a testing app
-    app = create_app()
-    app.config.update(
-        TESTING=True,
-        SQLALCHEMY_DATABASE_URI="sqlite://",
-        SQLALCHEMY_TRACK_MODIFICATIONS=False,
-        JWT_SECRET_KEY="test-secret",
-        PROPAGATE_EXCEPTIONS=True,
-        # Make errors bubble up to tests
-        API_TITLE="BlueWave API (tests)",
-        API_VERSION="1.0-test",
-    )
+    # Build the testing app once; create_app() runs create_all() on the in-memory DB
+    app = create_app(TEST_CONFIG)
+    # Don't hold an app context open across requests: `g` lives on the app
+    # context, so a shared one would leak JWT claims from one request to the next.
+    yield app
     with app.app_context():
-        _db.create_all()
-        yield app
         _db.session.remove()
         _db.drop_all()
 
+@pytest.fixture(autouse=True)
+def _clean_tables(app):
+    """Give every test an empty database without rebuilding the schema."""
+    yield
+    with app.app_context():
+        _db.session.rollback()
+        for table in reversed(_db.metadata.sorted_tables):
+            _db.session.execute(table.delete())
+        _db.session.commit()
+
+@pytest.fixture()
+def make_obs(app):
+    """Insert an Observation through the ORM (no HTTP round-trip); returns its id."""
+    def _make(**over):
+        with app.app_context():
+            obs = make_observation(_db.session, **over)
+            _db.session.commit()
+            return obs.id
+    return _make
+
+@pytest.fixture()
+def seeded_telemetry(make_obs):
+    """
+    Three telemetry rows (BW-BOUY-0000..0002) built with the ORM factory,
+    skipping the HTTP/JWT/schema path. Function-scoped because _clean_tables
+    empties the database after every test. Returns their ids.
+    """
+    return [
+        make_obs(
+            buoy_id=f"BW-BOUY-{i:04d}",
+            observed_at=datetime(2025, 8, 26, i, tzinfo=timezone.utc),
+            latitude=i * 1.0,
+            longitude=i * 2.0,
+            raw_payload={"buoy_id": f"BW-BOUY-{i:04d}"},
+        )
+        for i in range(3)
+    ]
+
 @pytest.fixture()
 def client(app):
     return app.test_client()
@@ -46,24 +92,54 @@ def make_token(app, *, role="user", tier="processed", **extra):
         claims.update(extra or {})
         return create_access_token(identity="test-user", additional_claims=claims)
 
-@pytest.fixture()
-def admin_token(app):
-    return make_token(app, role="admin", tier="raw")
+@pytest.fixture(scope="session")
+def tokens(app):
+    """
+    Every test token, signed once per session (they only depend on the app's
+    secret): tokens.admin, tokens.processed, tokens.raw, tokens.device.
+    """
+    return SimpleNamespace(
+        admin=make_token(app, role="admin", tier="raw"),
+        # Has processed data tier (can access /observations list)
+        processed=make_token(app, role="user", tier="processed"),
+        # Can access /telemetry list
+        raw=make_token(app, role="user", tier="raw"),
+        # Device token cannot spoof buoy_id in POST /telemetry
+        device=make_token(app, role="device", tier="raw", buoy_id="BW-DEV-0001"),
+    )
 
-@pytest.fixture()
-def processed_user_token(app):
-    # Has processed data tier (can access /observations list)
-    return make_token(app, role="user", tier="processed")
+@pytest.fixture(scope="session")
+def admin_token(tokens):
+    return tokens.admin
 
-@pytest.fixture()
-def raw_user_token(app):
-    # Can access /telemetry list
-    return make_token(app, role="user", tier="raw")
+@pytest.fixture(scope="session")
+def processed_user_token(tokens):
+    return tokens.processed
 
-@pytest.fixture()
-def device_token(app):
-    # Device token cannot spoof buoy_id in POST /telemetry
-    return make_token(app, role="device", tier="raw", buoy_id="BW-DEV-0001")
+@pytest.fixture(scope="session")
+def raw_user_token(tokens):
+    return tokens.raw
+
+@pytest.fixture(scope="session")
+def device_token(tokens):
+    return tokens.device
 
 def auth_header(token):
     return {"Authorization": f"Bearer {token}"}
+
+# Request headers built once per session instead of an f-string + dict per call
+@pytest.fixture(scope="session")
+def admin_headers(admin_token):
+    return auth_header(admin_token)
+
+@pytest.fixture(scope="session")
+def processed_headers(processed_user_token):
+    return auth_header(processed_user_token)
+
+@pytest.fixture(scope="session")
+def raw_headers(raw_user_token):
+    return auth_header(raw_user_token)
+
+@pytest.fixture(scope="session")
+def device_headers(device_token):
+    return auth_header(device_token)
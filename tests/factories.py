@@ -0,0 +1,20 @@
+# tests/factories.py
+# Direct ORM row builders for tests whose subject is not the create endpoint.
+from datetime import datetime, timezone
+
+from models import Observation
+
+OBSERVATION_DEFAULTS = dict(
+    buoy_id="BW-OBS-0001",
+    observed_at=datetime(2025, 8, 26, 10, tzinfo=timezone.utc),
+    latitude=1.0,
+    longitude=2.0,
+    sea_surface_temp_c=20.5,
+)
+
+def make_observation(session, **over):
+    """Add an Observation (defaults match _mk_obs_body) and flush so it has an id."""
+    obs = Observation(**{**OBSERVATION_DEFAULTS, **over})
+    session.add(obs)
+    session.flush()
+    return obs
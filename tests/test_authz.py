@@ -1,21 +1,57 @@
 # tests/test_authz.py
 import pytest
 
-def test_telemetry_post_requires_role_device_or_admin(client, raw_user_token):
-    # raw_user_token has role=user, so POST must be forbidden by require_roles
+def test_telemetry_post_requires_role_device_or_admin(client, raw_headers):
+    # the raw-tier user token has role=user, so POST must be forbidden by require_roles
     res = client.post(
         "/telemetry",
         json={"observed_at": "2025-08-26T09:10:00Z"},
-        headers={"Authorization": f"Bearer {raw_user_token}"}
+        headers=raw_headers
     )
     assert res.status_code in (401, 403)
 
-def test_telemetry_list_requires_raw_tier(client, processed_user_token):
+def test_telemetry_list_requires_raw_tier(client, processed_headers):
     # processed tier is not allowed on /telemetry GET
-    res = client.get("/telemetry", headers={"Authorization": f"Bearer {processed_user_token}"})
+    res = client.get("/telemetry", headers=processed_headers)
     assert res.status_code in (401, 403)
 
-def test_observations_list_allows_processed_or_raw(client, processed_user_token):
-    res = client.get("/observations", headers={"Authorization": f"Bearer {processed_user_token}"})
+def test_observations_list_allows_processed_or_raw(client, processed_headers):
+    res = client.get("/observations", headers=processed_headers)
     # It can be empty initially, but must be authorized
     assert res.status_code == 200
+
+def test_register_without_token_is_401(client):
+    res = client.post("/auth/register", json={"email": "x@bluewave.io", "password": "x",
+                                              "role": "researcher", "tier": "processed"})
+    assert res.status_code == 401
+
+def test_register_requires_admin_role(client, processed_headers):
+    res = client.post("/auth/register", json={"email": "x@bluewave.io", "password": "x",
+                                              "role": "researcher", "tier": "processed"},
+                      headers=processed_headers)
+    assert res.status_code == 403
+
+def test_require_auth_checks_role_then_tier(app, tokens):
+    from utils import require_auth
+
+    @require_auth(roles=("admin", "user"), tiers=("raw",))
+    def view():
+        return "ok"
+
+    def call(token):
+        with app.test_request_context(headers={"Authorization": f"Bearer {token}"}):
+            out = view()
+            return out if isinstance(out, str) else out[1]
+
+    assert call(tokens.raw) == "ok"
+    assert call(tokens.admin) == "ok"        # admins pass any tier
+    assert call(tokens.processed) == 403     # right role, wrong tier
+    assert call(tokens.device) == 403        # wrong role
+
+def test_register_does_not_reuse_claims_across_requests(app, client, admin_headers):
+    # Inside one long-lived app context `g` outlives each request; an earlier
+    # admin request must not let a token-less register through.
+    body = {"email": "y@bluewave.io", "password": "x", "role": "researcher", "tier": "processed"}
+    with app.app_context():
+        assert client.get("/observations", headers=admin_headers).status_code == 200
+        assert client.post("/auth/register", json=body).status_code == 401
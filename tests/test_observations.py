@@ -1,5 +1,10 @@
 # tests/test_observations.py
 from datetime import datetime, timezone, timedelta
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+from db import db
 from utils import quarter_start
 
 def _mk_obs_body(ts_iso="2025-08-26T10:00:00Z", buoy="BW-OBS-0001"):
@@ -11,50 +16,53 @@ def _mk_obs_body(ts_iso="2025-08-26T10:00:00Z", buoy="BW-OBS-0001"):
         "sea_surface_temp_c": 20.5,
     }
 
-def test_create_and_get_observation(client, admin_token):
-    res = client.post("/observations", json=_mk_obs_body(), headers={"Authorization": f"Bearer {admin_token}"})
+def _seed_observations(client, headers, bodies):
+    """Seed rows with one bulk POST instead of a request per row; returns their ids."""
+    res = client.post("/observations/bulk", json={"items": bodies}, headers=headers)
+    assert res.status_code == 201, res.get_json()
+    return [c["id"] for c in res.get_json()["created"]]
+
+def test_create_and_get_observation(client, admin_headers):
+    res = client.post("/observations", json=_mk_obs_body(), headers=admin_headers)
     assert res.status_code == 201, res.get_json()
     created = res.get_json()
     oid = created["id"]
 
-    res2 = client.get(f"/observations/{oid}", headers={"Authorization": f"Bearer {admin_token}"})
+    res2 = client.get(f"/observations/{oid}", headers=admin_headers)
     assert res2.status_code == 200
     got = res2.get_json()
     assert got["buoy_id"] == "BW-OBS-0001"
     assert "raw_payload" in got  # admin can see raw_payload
 
-def test_list_observations_hides_raw_for_processed_tier(client, processed_user_token, admin_token):
+def test_list_observations_hides_raw_for_processed_tier(client, processed_headers, admin_headers):
     # seed one
-    client.post("/observations", json=_mk_obs_body(), headers={"Authorization": f"Bearer {admin_token}"})
+    _seed_observations(client, admin_headers, [_mk_obs_body()])
 
-    res = client.get("/observations", headers={"Authorization": f"Bearer {processed_user_token}"})
+    res = client.get("/observations?with_total=1", headers=processed_headers)
     assert res.status_code == 200
     payload = res.get_json()
     assert payload["total"] >= 1
     # processed tier should not see raw_payload
     assert all("raw_payload" not in item for item in payload["items"])
 
-def test_bulk_create_and_partial_errors(client, admin_token):
+def test_bulk_create_and_partial_errors(client, admin_headers):
     body = {
         "items": [
             _mk_obs_body("2025-08-26T10:01:00Z", "BW-BULK-1"),
             {"observed_at": "2025-08-26T10:02:00Z"},  # missing required buoy_id will likely error via schema/model
         ]
     }
-    res = client.post("/observations/bulk", json=body, headers={"Authorization": f"Bearer {admin_token}"})
+    res = client.post("/observations/bulk", json=body, headers=admin_headers)
     # Could be 201 or 207 depending on your model validation; we accept both
     assert res.status_code in (201, 207)
     payload = res.get_json()
     assert "created" in payload and "errors" in payload
     assert len(payload["created"]) >= 1
 
-def test_bulk_update_with_missing_id_gives_error(client, admin_token):
+def test_bulk_update_with_missing_id_gives_error(client, admin_headers):
     # Create two
-    ids = []
-    for i in range(2):
-        res = client.post("/observations", json=_mk_obs_body(f"2025-08-26T10:0{i}:00Z", f"BW-INIT-{i}"),
-                          headers={"Authorization": f"Bearer {admin_token}"})
-        ids.append(res.get_json()["id"])
+    ids = _seed_observations(client, admin_headers,
+                             [_mk_obs_body(f"2025-08-26T10:0{i}:00Z", f"BW-INIT-{i}") for i in range(2)])
 
     patch_body = {
         "items": [
@@ -62,37 +70,244 @@ def test_bulk_update_with_missing_id_gives_error(client, admin_token):
             {"notes": "missing-id"},  # should trigger "Missing id"
         ]
     }
-    res = client.patch("/observations/bulk", json=patch_body, headers={"Authorization": f"Bearer {admin_token}"})
+    res = client.patch("/observations/bulk", json=patch_body, headers=admin_headers)
     assert res.status_code in (200, 207)
     payload = res.get_json()
     assert any(err.get("error") == "Missing id" for err in payload["errors"])
 
-def test_replace_and_update_observation(client, admin_token):
-    res = client.post("/observations", json=_mk_obs_body(), headers={"Authorization": f"Bearer {admin_token}"})
-    oid = res.get_json()["id"]
+def test_replace_and_update_observation(client, admin_headers, make_obs):
+    # Edits are only allowed inside the current quarter, so seed and replace with "now"
+    now = datetime.now(timezone.utc)
+    oid = make_obs(observed_at=now)
 
     # PUT (replace)
-    body_replace = _mk_obs_body("2025-08-27T11:00:00Z", "BW-OBS-0002")
-    res_put = client.put(f"/observations/{oid}", json=body_replace, headers={"Authorization": f"Bearer {admin_token}"})
+    body_replace = _mk_obs_body(now.isoformat(), "BW-OBS-0002")
+    res_put = client.put(f"/observations/{oid}", json=body_replace, headers=admin_headers)
     assert res_put.status_code == 200
     assert res_put.get_json()["buoy_id"] == "BW-OBS-0002"
 
     # PATCH (partial)
-    res_patch = client.patch(f"/observations/{oid}", json={"notes": "patched"}, headers={"Authorization": f"Bearer {admin_token}"})
+    res_patch = client.patch(f"/observations/{oid}", json={"notes": "patched"}, headers=admin_headers)
     assert res_patch.status_code == 200
     assert res_patch.get_json()["notes"] == "patched"
 
-def test_no_edits_before_current_quarter(client, admin_token, app):
+def test_no_edits_before_current_quarter(client, admin_headers, make_obs):
     # Make an observation dated strictly before the start of the current quarter
     now = datetime.now(timezone.utc)
     qstart = quarter_start(now)
-    old_ts = (qstart - timedelta(days=1)).isoformat()
-
-    res = client.post("/observations", json=_mk_obs_body(old_ts, "BW-OLD-1"),
-                      headers={"Authorization": f"Bearer {admin_token}"})
-    oid = res.get_json()["id"]
+    oid = make_obs(buoy_id="BW-OLD-1", observed_at=qstart - timedelta(days=1))
 
     # Attempt to patch should fail with 409
     res_patch = client.patch(f"/observations/{oid}", json={"notes": "should-fail"},
-                             headers={"Authorization": f"Bearer {admin_token}"})
+                             headers=admin_headers)
     assert res_patch.status_code == 409
+
+def test_bulk_create_bad_item_does_not_roll_back_others(client, admin_headers):
+    body = {
+        "items": [
+            _mk_obs_body("2025-08-26T10:03:00Z", "BW-TXN-1"),
+            {"buoy_id": "BW-TXN-2", "observed_at": "2025-08-26T10:04:00Z"},  # missing lat/lon
+            _mk_obs_body("2025-08-26T10:05:00Z", "BW-TXN-3"),
+        ]
+    }
+    res = client.post("/observations/bulk", json=body, headers=admin_headers)
+    assert res.status_code == 207
+    payload = res.get_json()
+    assert [c["buoy_id"] for c in payload["created"]] == ["BW-TXN-1", "BW-TXN-3"]
+    assert payload["errors"] == [{"index": 1, "error": "Missing required field 'latitude'"}]
+
+    res2 = client.get("/observations?buoy_id=BW-TXN-3&with_total=1", headers=admin_headers)
+    assert res2.get_json()["total"] == 1
+
+def test_list_observations_has_next_and_keyset_cursor(client, admin_headers):
+    _seed_observations(client, admin_headers, [_mk_obs_body(f"2025-08-26T12:0{i}:00Z", "BW-PAGE-1") for i in range(3)])
+
+    res = client.get("/observations?buoy_id=BW-PAGE-1&page_size=2", headers=admin_headers)
+    assert res.status_code == 200
+    first = res.get_json()
+    assert "total" not in first  # COUNT(*) only on ?with_total=1
+    assert first["has_next"] is True
+    assert [o["observed_at"][:19] for o in first["items"]] == ["2025-08-26T12:02:00", "2025-08-26T12:01:00"]
+
+    res2 = client.get("/observations", query_string={
+        "buoy_id": "BW-PAGE-1", "page_size": 2,
+        "before": first["next_before"], "before_id": first["next_before_id"],
+    }, headers=admin_headers)
+    second = res2.get_json()
+    assert second["has_next"] is False
+    assert "next_before" not in second
+    assert [o["observed_at"][:19] for o in second["items"]] == ["2025-08-26T12:00:00"]
+
+def test_bulk_create_rejects_unknown_fields(client, admin_headers):
+    body = {"items": [_mk_obs_body("2025-08-26T10:06:00Z", "BW-UNK-1"), dict(_mk_obs_body(), bogus=1)]}
+    res = client.post("/observations/bulk", json=body, headers=admin_headers)
+    assert res.status_code == 207
+    payload = res.get_json()
+    assert [c["buoy_id"] for c in payload["created"]] == ["BW-UNK-1"]
+    assert payload["errors"] == [{"index": 1, "error": "Unknown field(s): bogus"}]
+
+def test_bulk_update_bad_item_keeps_other_updates(client, admin_headers, make_obs):
+    now = datetime.now(timezone.utc)
+    ids = [make_obs(buoy_id=f"BW-BUP-{i}", observed_at=now) for i in range(2)]
+
+    patch_body = {
+        "items": [
+            {"id": ids[0], "notes": "bulk-ok"},
+            {"id": ids[1], "latitude": None},  # NOT NULL -> rolled back on its own
+            {"id": 10_000_000, "notes": "missing"},
+        ]
+    }
+    res = client.patch("/observations/bulk", json=patch_body, headers=admin_headers)
+    assert res.status_code == 207
+    payload = res.get_json()
+    assert [o["id"] for o in payload["updated"]] == [ids[0]]
+    assert sorted(e["index"] for e in payload["errors"]) == [1, 2]
+
+    got = client.get(f"/observations/{ids[0]}", headers=admin_headers).get_json()
+    assert got["notes"] == "bulk-ok"
+    got = client.get(f"/observations/{ids[1]}", headers=admin_headers).get_json()
+    assert got["latitude"] == 1.0
+
+def test_guarded_delete_in_current_quarter(client, admin_headers, make_obs):
+    # PUT/PATCH on a current-quarter row is covered by test_replace_and_update_observation
+    oid = make_obs(buoy_id="BW-GUARD-1", observed_at=datetime.now(timezone.utc))
+
+    res_del = client.delete(f"/observations/{oid}", headers=admin_headers)
+    assert res_del.status_code == 204
+    res_missing = client.patch(f"/observations/{oid}", json={"notes": "gone"},
+                               headers=admin_headers)
+    assert res_missing.status_code == 404
+
+def test_no_deletes_before_current_quarter(client, admin_headers, make_obs):
+    old_dt = quarter_start(datetime.now(timezone.utc)) - timedelta(days=1)
+    oid = make_obs(buoy_id="BW-OLD-2", observed_at=old_dt)
+
+    res_del = client.delete(f"/observations/{oid}", headers=admin_headers)
+    assert res_del.status_code == 409
+    assert client.get(f"/observations/{oid}", headers=admin_headers).status_code == 200
+
+def test_bulk_update_applies_mixed_columns(client, admin_headers, make_obs):
+    now = datetime.now(timezone.utc)
+    ids = [make_obs(buoy_id=f"BW-CASE-{i}", observed_at=now) for i in range(2)]
+
+    new_ts = now.replace(microsecond=0).isoformat()
+    patch_body = {
+        "items": [
+            {"id": ids[0], "notes": "case-a", "latitude": 5.5},
+            {"id": ids[1], "observed_at": new_ts, "haze": True},
+            {"id": ids[1], "bogus": 1},
+        ]
+    }
+    res = client.patch("/observations/bulk", json=patch_body, headers=admin_headers)
+    assert res.status_code == 207
+    payload = res.get_json()
+    assert payload["errors"] == [{"index": 2, "id": ids[1], "error": "Unknown field(s): bogus"}]
+    first, second = payload["updated"]
+    assert (first["notes"], first["latitude"], first["haze"]) == ("case-a", 5.5, None)
+    assert (second["notes"], second["latitude"], second["haze"]) == (None, 1.0, True)
+    assert second["observed_at"][:19] == new_ts[:19]
+
+def test_list_observations_opaque_cursor(client, admin_headers):
+    _seed_observations(client, admin_headers, [_mk_obs_body(f"2025-08-26T13:0{i}:00Z", "BW-CUR-1") for i in range(3)])
+
+    first = client.get("/observations?buoy_id=BW-CUR-1&page_size=2",
+                       headers=admin_headers).get_json()
+    second = client.get("/observations", query_string={"buoy_id": "BW-CUR-1", "page_size": 2, "after": first["next_cursor"]},
+                        headers=admin_headers).get_json()
+    assert [o["observed_at"][:19] for o in second["items"]] == ["2025-08-26T13:00:00"]
+    assert second["has_next"] is False
+
+    res = client.get("/observations?after=not-a-cursor", headers=admin_headers)
+    assert res.status_code == 422
+
+def test_fast_path_dump_matches_schema_dump(client, admin_headers):
+    body = dict(_mk_obs_body("2025-08-26T14:00:00Z", "BW-DUMP-1"), haze=False, notes="n", ph=7.1)
+    created = client.post("/observations", json=body, headers=admin_headers).get_json()
+    got = client.get(f"/observations/{created['id']}", headers=admin_headers).get_json()
+    # GET uses the hand-written dump; POST goes through ObservationBaseSchema
+    assert got == created
+    assert list(got) == list(created)  # same key order (sort_keys is off)
+
+def test_create_with_date_time_and_timezone_converts_to_utc(client, admin_headers):
+    body = {"buoy_id": "BW-TZ-1", "date": "2025-08-26", "time": "12:00:00",
+            "timezone": "Africa/Nairobi", "latitude": 1.0, "longitude": 2.0}
+    res = client.post("/observations", json=body, headers=admin_headers)
+    assert res.status_code == 201, res.get_json()
+    assert res.get_json()["observed_at"].startswith("2025-08-26T09:00:00")
+
+def test_bulk_update_reports_old_records(client, admin_headers, make_obs):
+    old_dt = quarter_start(datetime.now(timezone.utc)) - timedelta(days=1)
+    oid = make_obs(buoy_id="BW-OLD-3", observed_at=old_dt)
+
+    res = client.patch("/observations/bulk", json={"items": [{"id": oid, "notes": "nope"}]},
+                       headers=admin_headers)
+    assert res.status_code == 207
+    assert res.get_json()["errors"] == [{"index": 0, "id": oid,
+                                         "error": "Edits to records prior to the current quarter are not allowed."}]
+
+def test_bulk_update_accepts_string_ids_and_rejects_invalid(client, admin_headers, make_obs):
+    oid = make_obs(observed_at=datetime.now(timezone.utc))
+    body = {"items": [{"id": str(oid), "notes": "by-string-id"}, {"id": "abc", "notes": "x"}]}
+    res = client.patch("/observations/bulk", json=body, headers=admin_headers)
+    assert res.status_code == 207
+    payload = res.get_json()
+    assert [(o["id"], o["notes"]) for o in payload["updated"]] == [(oid, "by-string-id")]
+    assert payload["errors"] == [{"index": 1, "error": "Invalid id 'abc'"}]
+
+def test_list_observations_db_error_fails_before_streaming(app, client, admin_headers):
+    with app.app_context():
+        db.session.execute(text("ALTER TABLE observations RENAME TO observations_hidden"))
+        db.session.commit()
+    try:
+        # The query must fail while building the response, not after a 200 went out
+        with pytest.raises(OperationalError):
+            client.get("/observations", headers=admin_headers)
+    finally:
+        with app.app_context():
+            db.session.rollback()
+            db.session.execute(text("ALTER TABLE observations_hidden RENAME TO observations"))
+            db.session.commit()
+
+def test_bulk_create_inserts_in_one_statement(app, client, admin_headers):
+    inserts = []
+
+    def count_inserts(conn, cursor, statement, *args):
+        if statement.lstrip().upper().startswith("INSERT"):
+            inserts.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", count_inserts)
+    try:
+        bodies = [_mk_obs_body(f"2025-08-26T15:0{i}:00Z", f"BW-ONE-{i}") for i in range(5)]
+        res = client.post("/observations/bulk", json={"items": bodies}, headers=admin_headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", count_inserts)
+    assert res.status_code == 201
+    assert len(inserts) == 1
+    assert [c["buoy_id"] for c in res.get_json()["created"]] == [f"BW-ONE-{i}" for i in range(5)]
+
+def test_create_with_non_string_timezone_is_422(client, admin_headers):
+    for tz in (5, ["UTC"]):
+        body = {"buoy_id": "BW-TZ-BAD", "date": "2025-08-26", "time": "10:00:00", "timezone": tz,
+                "latitude": 1.0, "longitude": 2.0}
+        res = client.post("/observations", json=body, headers=admin_headers)
+        assert res.status_code == 422, tz
+
+def test_patch_is_a_single_update_statement(app, client, admin_headers, make_obs):
+    oid = make_obs(observed_at=datetime.now(timezone.utc))
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement.lstrip().split(None, 1)[0].upper())
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        res = client.patch(f"/observations/{oid}", json={"notes": "one-shot"}, headers=admin_headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert res.status_code == 200
+    assert res.get_json()["notes"] == "one-shot"
+    assert statements == ["UPDATE"]
@@ -1,7 +1,7 @@
 # tests/test_telemetry.py
 from datetime import datetime, timezone, timedelta
 
-def test_post_telemetry_with_observed_at_iso(client, device_token):
+def test_post_telemetry_with_observed_at_iso(client, device_headers):
     body = {
         "observed_at": "2025-08-26T11:00:00Z",
         "latitude": -1.23,
@@ -9,20 +9,20 @@ def test_post_telemetry_with_observed_at_iso(client, device_token):
         "sensors": {"turbidity": 1.2},
         "notes": "sample"
     }
-    res = client.post("/telemetry", json=body, headers={"Authorization": f"Bearer {device_token}"})
+    res = client.post("/telemetry", json=body, headers=device_headers)
     assert res.status_code == 201, res.get_json()
     data = res.get_json()
     assert "id" in data
 
     # Fetch it back by id
     rid = data["id"]
-    res2 = client.get(f"/telemetry/{rid}", headers={"Authorization": f"Bearer {device_token}"})
+    res2 = client.get(f"/telemetry/{rid}", headers=device_headers)
     assert res2.status_code == 200
     got = res2.get_json()
     assert got["buoy_id"] == "BW-DEV-0001"   
     assert got["raw_payload"]["sensors"]["turbidity"] == 1.2
 
-def test_post_telemetry_with_date_time_timezone_is_json_safe(client, admin_token):
+def test_post_telemetry_with_date_time_timezone_is_json_safe(client, admin_headers):
     # Use date+time form; ensure raw_payload stores strings (JSON-safe)
     body = {
         "date": "2025-08-26",
@@ -31,34 +31,20 @@ def test_post_telemetry_with_date_time_timezone_is_json_safe(client, admin_token
         "latitude": 0.1,
         "longitude": 0.2,
     }
-    res = client.post("/telemetry", json=body, headers={"Authorization": f"Bearer {admin_token}"})
+    res = client.post("/telemetry", json=body, headers=admin_headers)
     assert res.status_code == 201, res.get_json()
     rid = res.get_json()["id"]
 
-    res2 = client.get(f"/telemetry/{rid}", headers={"Authorization": f"Bearer {admin_token}"})
+    res2 = client.get(f"/telemetry/{rid}", headers=admin_headers)
     assert res2.status_code == 200
     got = res2.get_json()
     # raw_payload date/time should be strings (no datetime objects)
     assert isinstance(got["raw_payload"]["date"], str)
     assert isinstance(got["raw_payload"]["time"], str)
 
-def test_get_telemetry_pagination_and_filters(client, admin_token):
-    # Create several telemetry rows
-    for i in range(3):
-        res = client.post(
-            "/telemetry",
-            json={
-                "observed_at": f"2025-08-26T0{i}:00:00Z",
-                "latitude": i * 1.0,
-                "longitude": i * 2.0,
-                "buoy_id": f"BW-BOUY-{i:04d}",
-            },
-            headers={"Authorization": f"Bearer {admin_token}"},
-        )
-        assert res.status_code == 201
-
+def test_get_telemetry_pagination_and_filters(client, admin_headers, seeded_telemetry):
     # Default list (page=1)
-    res = client.get("/telemetry", headers={"Authorization": f"Bearer {admin_token}"})
+    res = client.get("/telemetry?with_total=1", headers=admin_headers)
     assert res.status_code == 200
     payload = res.get_json()
     assert "items" in payload
@@ -68,14 +54,94 @@ def test_get_telemetry_pagination_and_filters(client, admin_token):
     # Filter by buoy_id
     res2 = client.get(
         "/telemetry?buoy_id=BW-BOUY-0001",
-        headers={"Authorization": f"Bearer {admin_token}"},
+        headers=admin_headers,
     )
     assert res2.status_code == 200
     items = res2.get_json()["items"]
+    assert [item["id"] for item in items] == [seeded_telemetry[1]]
     assert all(item["buoy_id"] == "BW-BOUY-0001" for item in items)
 
-def test_get_telemetry_invalid_start_is_422(client, admin_token):
-    res = client.get("/telemetry?start=not-a-date", headers={"Authorization": f"Bearer {admin_token}"})
+def test_get_telemetry_invalid_start_is_422(client, admin_headers):
+    res = client.get("/telemetry?start=not-a-date", headers=admin_headers)
     assert res.status_code == 422
     msg = res.get_json().get("message", "").lower()
     assert "invalid 'start'" in msg or "invalid" in msg
+
+def test_get_telemetry_keyset_cursor(client, admin_headers):
+    items = [{"observed_at": f"2025-08-27T0{i}:00:00Z", "buoy_id": "BW-SEEK-1", "latitude": 0.0, "longitude": 0.0}
+             for i in range(3)]
+    res = client.post("/telemetry", json={"items": items}, headers=admin_headers)
+    assert res.status_code == 201
+
+    res = client.get("/telemetry?buoy_id=BW-SEEK-1&page_size=2", headers=admin_headers)
+    first = res.get_json()
+    assert "total" not in first
+    assert first["has_next"] is True and len(first["items"]) == 2
+
+    res2 = client.get("/telemetry", query_string={"buoy_id": "BW-SEEK-1", "page_size": 2, "after": first["next_cursor"]},
+                      headers=admin_headers)
+    second = res2.get_json()
+    assert second["has_next"] is False
+    seen = [item["id"] for item in first["items"] + second["items"]]
+    assert len(seen) == 3 and seen == sorted(seen, reverse=True)
+
+def test_get_telemetry_invalid_cursor_is_422(client, admin_headers):
+    res = client.get("/telemetry?after=%%%", headers=admin_headers)
+    assert res.status_code == 422
+
+def test_post_telemetry_batch_items(client, device_headers):
+    body = {"items": [
+        {"observed_at": "2025-08-26T12:00:00Z", "latitude": 1.0, "longitude": 2.0, "buoy_id": "SPOOF"},
+        {"date": "2025-08-26", "time": "12:05:00", "timezone": "UTC", "latitude": 1.1, "longitude": 2.1,
+         "sensors": {"turbidity": 0.4}},
+    ]}
+    res = client.post("/telemetry", json=body, headers=device_headers)
+    assert res.status_code == 201, res.get_json()
+    ids = res.get_json()["ids"]
+    assert len(ids) == 2
+
+    got = [client.get(f"/telemetry/{rid}", headers=device_headers).get_json()
+           for rid in ids]
+    assert [g["buoy_id"] for g in got] == ["BW-DEV-0001", "BW-DEV-0001"]  # device cannot spoof
+    assert got[1]["observed_at"].startswith("2025-08-26T12:05:00")
+    assert got[1]["raw_payload"]["sensors"]["turbidity"] == 0.4
+
+def test_get_telemetry_start_with_offset_is_compared_in_utc(client, admin_headers):
+    res = client.post("/telemetry", json={"observed_at": "2025-08-28T10:00:00Z", "buoy_id": "BW-TZ-1",
+                                             "latitude": 0.0, "longitude": 0.0},
+                      headers=admin_headers)
+    assert res.status_code == 201
+    # 11:30+02:00 is 09:30Z, so the 10:00Z row is inside the window
+    res = client.get("/telemetry", query_string={"buoy_id": "BW-TZ-1", "start": "2025-08-28T11:30:00+02:00"},
+                     headers=admin_headers)
+    assert [item["buoy_id"] for item in res.get_json()["items"]] == ["BW-TZ-1"]
+
+def test_get_telemetry_clamps_page_and_page_size(client, admin_headers, seeded_telemetry):
+    for qs in ("page_size=0", "page_size=-1", "page=0", "page=-3&page_size=1"):
+        res = client.get(f"/telemetry?{qs}", headers=admin_headers)
+        assert res.status_code == 200, qs
+        payload = res.get_json()
+        assert payload["page"] >= 1 and 1 <= payload["page_size"] <= 500
+        assert len(payload["items"]) == min(payload["page_size"], 3)
+
+    res = client.get("/telemetry?page_size=100000", headers=admin_headers)
+    assert res.get_json()["page_size"] == 500
+
+def test_post_telemetry_batch_rejects_incomplete_record(client, admin_headers):
+    body = {"items": [
+        {"observed_at": "2025-08-29T00:00:00Z", "buoy_id": "BW-OK-1", "latitude": 0.0, "longitude": 0.0},
+        {"buoy_id": "BW-BAD-1"},
+    ]}
+    res = client.post("/telemetry", json=body, headers=admin_headers)
+    assert res.status_code == 422
+    assert res.get_json()["message"] == "items[1]: missing required field 'latitude'"
+    # nothing from the batch was written
+    assert client.get("/telemetry?buoy_id=BW-OK-1", headers=admin_headers).get_json()["items"] == []
+
+    res = client.post("/telemetry", json={"items": []}, headers=admin_headers)
+    assert res.status_code == 422
+    assert res.get_json()["message"] == "'items' must not be empty"
+
+    res = client.post("/telemetry", json={"buoy_id": "BW-BAD-2", "latitude": 1.0}, headers=admin_headers)
+    assert res.status_code == 422
+    assert res.get_json()["message"] == "Missing required field 'longitude'"
@@ -1,49 +1,174 @@
+import base64
+import re
 from datetime import datetime, timezone
-from functools import wraps
-from flask import jsonify
+from functools import wraps, lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from dateutil import parser as dtparser
+from sqlalchemy import and_, or_, func
+from flask import jsonify, g, request
 from flask_jwt_extended import verify_jwt_in_request, get_jwt
 
+def request_now_utc() -> datetime:
+    """UTC 'now' read once per request (cached on g) and shared by every caller in it."""
+    now = g.get("now_utc")
+    if now is None:
+        now = g.now_utc = datetime.now(timezone.utc)
+    return now
+
 def quarter_start(dt: datetime) -> datetime:
     # Compute start of the current quarter (UTC) for edit-protection
-    q_month = ((dt.month - 1) // 3) * 3 + 1
-    return datetime(dt.year, q_month, 1, tzinfo=timezone.utc)
+    return _quarter_start(dt.year, (dt.month - 1) // 3)
+
+@lru_cache(maxsize=8)
+def _quarter_start(year: int, quarter: int) -> datetime:
+    # Constant within a quarter, so build it once per (year, quarter)
+    return datetime(year, quarter * 3 + 1, 1, tzinfo=timezone.utc)
 
 def ensure_aware_utc(dt: datetime) -> datetime:
     """Return a UTC-aware datetime (treat naive as UTC)."""
     if dt is None:
         return None
+    tz = dt.tzinfo
+    # Common case: already UTC (datetime.now(timezone.utc), "...Z"/"+00:00" input)
+    if tz is timezone.utc:
+        return dt
     # tz-naive or tzinfo with no offset => treat as UTC
-    if dt.tzinfo is None or dt.tzinfo.utcoffset(dt) is None:
+    if tz is None or tz.utcoffset(dt) is None:
         return dt.replace(tzinfo=timezone.utc)
     return dt.astimezone(timezone.utc)
 
-def require_roles(*roles):
-    def decorator(fn):
+# Every ISO 8601 form dateutil accepts starts with a 4-digit year
+_ISO_YEAR_PREFIX = re.compile(r"\d{4}")
+
+def parse_iso(val: str) -> datetime:
+    """Parse an ISO 8601 string; C fast path first, dateutil for the odd forms."""
+    try:
+        return datetime.fromisoformat(val.replace("Z", "+00:00"))
+    except ValueError:
+        # Plainly non-ISO input (e.g. ?start=not-a-date): fail without dateutil
+        if not _ISO_YEAR_PREFIX.match(val):
+            raise
+        return dtparser.isoparse(val)
+
+def parse_iso_utc(val: str) -> datetime:
+    """parse_iso() normalized to a UTC-aware datetime (naive input is taken as UTC)."""
+    return ensure_aware_utc(parse_iso(val))
+
+@lru_cache(maxsize=64)
+def get_tz(name: str):
+    """Cached IANA timezone lookup (zoneinfo). Returns None for unknown names."""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return None
+
+def int_arg(name: str, default: int, *, minimum: int = 1, maximum: int = 500) -> int:
+    """Parse an int query param, with sane defaults and clamping."""
+    raw = request.args.get(name, None)
+    try:
+        val = int(raw) if raw not in (None, "") else default
+    except Exception:
+        val = default
+    if val < minimum:
+        val = minimum
+    if maximum is not None and val > maximum:
+        val = maximum
+    return val
+
+def truthy_arg(name: str) -> bool:
+    """True for ?name=1/true/yes (case-insensitive)."""
+    return (request.args.get(name) or "").lower() in ("1", "true", "yes")
+
+def encode_cursor(ts: datetime, row_id: int) -> str:
+    """Opaque keyset cursor for a (timestamp, id) ordered list."""
+    raw = f"{ts.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(token: str):
+    """Inverse of encode_cursor -> (datetime, id). Raises ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        ts, row_id = raw.rsplit("|", 1)
+        return parse_iso(ts), int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def seek_before(q, ts_col, id_col, ts, row_id=None):
+    """
+    Keyset filter for a list ordered by (ts_col DESC, id_col DESC): keep rows
+    that sort after the cursor row. Uses the ts_col index instead of OFFSET.
+    """
+    if not row_id:
+        return q.filter(ts_col < ts)
+    return q.filter(or_(ts_col < ts, and_(ts_col == ts, id_col < row_id)))
+
+def count_rows(q, column) -> int:
+    """
+    SELECT count(column) with the query's filters, without Query.count()'s
+    SELECT count(*) FROM (SELECT <every column> ...) wrapper or its ORDER BY.
+    Pass a NOT NULL column (e.g. the primary key) so it counts every row.
+    """
+    return q.with_entities(func.count(column)).order_by(None).scalar()
+
+def request_claims() -> dict:
+    """
+    JWT claims for the current request, verifying the token at most once.
+    Reuses the claims @jwt_required() already decoded onto `g`; only
+    verifies here when no outer decorator has done so.
+
+    `g` lives on the app context, not the request: inside a long-lived app
+    context (tests, scripts, CLI) it can still hold an earlier request's
+    claims. Views guarded by require_roles/require_tiers/require_auth must
+    therefore sit under @jwt_required(), which verifies every request.
+    """
+    try:
+        return get_jwt()
+    except RuntimeError:
+        verify_jwt_in_request()
+        return get_jwt()
+
+class RequireAuth:
+    """
+    Role and/or data-tier guard in one wrapper: a single claims lookup, role
+    checked first, then tier (admins pass any tier). Use this instead of
+    stacking @require_roles and @require_tiers on the same view.
+
+    The allowed sets are frozen once per decorated view; the wrapper itself
+    stays a plain function so flask-smorest's per-view doc attributes
+    (copied by functools.wraps) keep working.
+    """
+    __slots__ = ("roles", "tiers")
+
+    def __init__(self, roles=None, tiers=None):
+        self.roles = frozenset(roles or ())
+        self.tiers = frozenset(tiers or ())
+
+    def __call__(self, fn):
+        roles, tiers = self.roles, self.tiers
+
         @wraps(fn)
         def wrapper(*args, **kwargs):
-            verify_jwt_in_request()
-            claims = get_jwt()
-            if claims.get("role") not in roles:
+            claims = request_claims()
+            role = claims.get("role")
+            if roles and role not in roles:
                 return jsonify({"message": "Forbidden: insufficient role"}), 403
+            if tiers and claims.get("tier") not in tiers and role != "admin":
+                return jsonify({"message": "Forbidden: insufficient data tier"}), 403
             return fn(*args, **kwargs)
         return wrapper
-    return decorator
+
+require_auth = RequireAuth
+
+def require_roles(*roles):
+    return RequireAuth(roles=roles)
 
 def require_tiers(*tiers):
-    def decorator(fn):
-        @wraps(fn)
-        def wrapper(*args, **kwargs):
-            verify_jwt_in_request()
-            claims = get_jwt()
-            if claims.get("tier") not in tiers and claims.get("role") != "admin":
-                return jsonify({"message": "Forbidden: insufficient data tier"}), 403
-            return fn(*args, **kwargs)
-        return wrapper
-    return decorator
+    return RequireAuth(tiers=tiers)
 
 def current_user_claims():
-    verify_jwt_in_request(optional=True)
+    """Claims for the current request ({} without a token); verifies at most once."""
     try:
         return get_jwt()
-    except Exception:
-        return {}
+    except RuntimeError:
+        verify_jwt_in_request(optional=True)
+        return get_jwt() or {}